@@ -0,0 +1,36 @@
+# app/background_tasks/jobs/batching.py
+import asyncio
+from typing import Awaitable, Callable
+from app.core.location_cache import Loc
+from app.utils.helpers.fetch_data import MAX_CONCURRENT_REQUESTS
+
+# Rows are written in batches of this size while fetches are still in flight
+FLUSH_SIZE = 200
+
+async def stream_in_batches(
+    locations: list[Loc],
+    fetch_one: Callable[[asyncio.Semaphore, Loc], Awaitable[list[dict]]],
+    store: Callable[[list[dict]], Awaitable[None]]
+):
+    """
+    Fetch rows for every location concurrently and store them in FLUSH_SIZE batches.
+
+    fetch_one returns the rows for one location, or [] to skip it for this run.
+    No database connection is held while waiting on OpenWeather; store opens
+    its own short transaction per batch, while the remaining fetches keep running.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    pending: list[dict] = []
+    async with asyncio.TaskGroup() as task_group:
+        tasks = [
+            task_group.create_task(fetch_one(semaphore, location))
+            for location in locations
+        ]
+        for next_rows in asyncio.as_completed(tasks):
+            pending.extend(await next_rows)
+            if len(pending) >= FLUSH_SIZE:
+                await store(pending)
+                pending = []
+
+    if pending:
+        await store(pending)
@@ -0,0 +1,9 @@
+# app/background_tasks/jobs/extractors.py
+from operator import itemgetter
+
+# Extractors for the fixed-shape sections of an OpenWeather payload, shared by
+# current weather responses and forecast entries
+condition_fields = itemgetter("main", "description")
+main_fields = itemgetter("temp", "feels_like", "temp_min", "temp_max", "pressure", "humidity")
+wind_fields = itemgetter("deg", "speed")
+sun_fields = itemgetter("sunrise", "sunset")
@@ -1,67 +1,85 @@
 # app/background_tasks/jobs/fetch_current_weather.py
 import asyncio
-from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.utils import logger
-from app.models import Location, WeatherData
-from datetime import datetime
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.utils.helpers.fetch_data import fetch_data_from_api
+from app.models import WeatherData
+from app.utils.helpers.timestamps import utc_from_timestamp
+from app.utils.helpers.fetch_data import fetch_data_from_api, WEATHER_URL, CURRENT_WEATHER_CACHE_TTL
+from app.core.location_cache import Loc, get_locations
 from app.core.database import AsyncSessionLocal
+from app.background_tasks.jobs.batching import stream_in_batches
+from app.background_tasks.jobs.extractors import condition_fields, main_fields, wind_fields, sun_fields
 
 async def fetch_current_weather_job():
-    async with AsyncSessionLocal() as db:
-        try:
-            logger.info("Starting async current weather job...")
-            result = await db.execute(select(Location))
-            locations = result.scalars().all()
-            
-            tasks = []
-            for location in locations:
-                tasks.append(fetch_location_weather(db, location))
-            
-            await asyncio.gather(*tasks)
-            await db.commit()
-            logger.info("Current weather data updated for all locations.")
+    try:
+        logger.info("Starting async current weather job...")
+        async with AsyncSessionLocal() as db:
+            locations = await get_locations(db)
 
-        except Exception as e:
-            await db.rollback()
-            logger.error(f"Current weather job failed: {str(e)}")
-            raise
+        await stream_in_batches(locations, process_location_weather, insert_current_weather_rows)
+        logger.info("Current weather data updated for all locations.")
 
-async def fetch_location_weather(db: AsyncSession, location: Location):
-    params = {"lat": location.lat, "lon": location.lon}
-    try:
-        weather_data = await fetch_data_from_api(
-            "https://api.openweathermap.org/data/2.5/weather", 
-            params
+    except Exception as e:
+        logger.error("Current weather job failed: %s", e)
+        raise
+
+async def insert_current_weather_rows(rows: list[dict]):
+    # Single executemany INSERT (batched into multi-row VALUES by SQLAlchemy);
+    # re-runs within the same calculation window are skipped by the unique
+    # constraint.
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            pg_insert(WeatherData.__table__)
+            .on_conflict_do_nothing(index_elements=["city_id", "data_calculation_time"]),
+            rows
         )
+        await db.commit()
+
+async def process_location_weather(
+    semaphore: asyncio.Semaphore, location: Loc
+) -> list[dict]:
+    params = {"lat": location.lat, "lon": location.lon, "units": "metric"}
+    try:
+        async with semaphore:
+            weather_data = await fetch_data_from_api(
+                WEATHER_URL,
+                params,
+                cache_ttl=CURRENT_WEATHER_CACHE_TTL
+            )
         
-        current_weather = WeatherData(
-            weather_main=weather_data["weather"][0]["main"],
-            description=weather_data["weather"][0]["description"],
-            data_calculation_time=datetime.fromtimestamp(weather_data["dt"]),
-            temperature=weather_data["main"]["temp"] - 273.15,
-            feels_like=weather_data["main"]["feels_like"] - 273.15,
-            min_temperature=weather_data["main"]["temp_min"] - 273.15,
-            max_temperature=weather_data["main"]["temp_max"] - 273.15,
-            pressure=weather_data["main"]["pressure"],
-            humidity=weather_data["main"]["humidity"],
-            sea_level=weather_data["main"].get("sea_level"),
-            ground_level=weather_data["main"].get("grnd_level"),
-            weather_degrees=weather_data["wind"]["deg"],
-            wind_speed=weather_data["wind"]["speed"],
+        weather_main, description = condition_fields(weather_data["weather"][0])
+        main = weather_data["main"]
+        temperature, feels_like, min_temperature, max_temperature, pressure, humidity = main_fields(main)
+        weather_degrees, wind_speed = wind_fields(weather_data["wind"])
+        sunrise, sunset = sun_fields(weather_data["sys"])
+
+        current_weather = dict(
+            weather_main=weather_main,
+            description=description,
+            data_calculation_time=utc_from_timestamp(weather_data["dt"]),
+            temperature=temperature,
+            feels_like=feels_like,
+            min_temperature=min_temperature,
+            max_temperature=max_temperature,
+            pressure=pressure,
+            humidity=humidity,
+            sea_level=main.get("sea_level"),
+            ground_level=main.get("grnd_level"),
+            weather_degrees=weather_degrees,
+            wind_speed=wind_speed,
             wind_gust=weather_data["wind"].get("gust"),
             rain=weather_data.get("rain", {}).get("1h"),
             snow=weather_data.get("snow", {}).get("1h"),
             cloudiness=weather_data["clouds"]["all"],
             visibility=weather_data.get("visibility"),
-            sunrise_time=datetime.fromtimestamp(weather_data["sys"]["sunrise"]),
-            sunset_time=datetime.fromtimestamp(weather_data["sys"]["sunset"]),
+            sunrise_time=utc_from_timestamp(sunrise),
+            sunset_time=utc_from_timestamp(sunset),
             city_id=location.id
         )
-        db.add(current_weather)
-        logger.info(f"Weather data collected for {location.name}")
+        logger.info("Weather data collected for %s", location.name)
+        return [current_weather]
 
     except Exception as e:
-        logger.error(f"Failed to fetch weather for {location.name}: {str(e)}")
-        raise
\ No newline at end of file
+        # A failed location is skipped for this run instead of aborting the job
+        logger.error("Failed to fetch weather for %s: %s", location.name, e)
+        return []
@@ -1,70 +1,115 @@
 # app/background_tasks/jobs/fetch_weather_forecast.py
 import asyncio
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime
 from app.utils import logger
-from app.models import Location, WeatherForecast
-from app.utils.helpers.fetch_data import fetch_data_from_api
+from app.models import WeatherForecast
+from app.utils.helpers.timestamps import utc_from_timestamp
+from app.utils.helpers.fetch_data import fetch_data_from_api, FORECAST_URL
+from app.core.location_cache import Loc, get_locations
 from app.core.database import AsyncSessionLocal
+from app.background_tasks.jobs.batching import stream_in_batches
+from app.background_tasks.jobs.extractors import condition_fields, main_fields, wind_fields
+
+# A re-fetched (city, time) slot replaces the older prediction's values
+CONFLICT_COLUMNS = ["city_id", "data_calculation_time"]
+UPDATE_COLUMNS = [
+    column.name for column in WeatherForecast.__table__.columns
+    if column.name not in ("id", *CONFLICT_COLUMNS)
+]
 
 async def fetch_forecast_job():
+    try:
+        logger.info("Starting async forecast job...")
+        async with AsyncSessionLocal() as db:
+            locations = await get_locations(db)
+
+        await stream_in_batches(locations, process_location_forecast, store_forecast_rows)
+        logger.info("Forecast data updated for all locations.")
+
+    except Exception as e:
+        logger.error("Forecast job failed: %s", e)
+        raise
+
+async def store_forecast_rows(rows: list[dict]):
+    # Forecast windows overlap between runs, so already stored (city, time)
+    # slots are updated with the newer prediction rather than duplicated.
     async with AsyncSessionLocal() as db:
-        try:
-            logger.info("Starting async forecast job...")
-            result = await db.execute(select(Location))
-            locations = result.scalars().all()
-            
-            tasks = []
-            for location in locations:
-                tasks.append(process_location_forecast(db, location))
-            
-            await asyncio.gather(*tasks)
-            await db.commit()
-            logger.info("Forecast data updated for all locations.")
+        stmt = pg_insert(WeatherForecast.__table__)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=CONFLICT_COLUMNS,
+                set_={column: stmt.excluded[column] for column in UPDATE_COLUMNS}
+            ),
+            rows
+        )
+        await db.commit()
 
-        except Exception as e:
-            await db.rollback()
-            logger.error(f"Forecast job failed: {str(e)}")
-            raise
+async def process_location_forecast(
+    semaphore: asyncio.Semaphore, location: Loc
+) -> list[dict]:
+    params = {"lat": location.lat, "lon": location.lon, "units": "metric"}
+    try:
+        async with semaphore:
+            weather_data = await fetch_data_from_api(
+                FORECAST_URL,
+                params
+            )
 
-async def process_location_forecast(db: AsyncSession, location: Location):
-    params = {"lat": location.lat, "lon": location.lon}
-    weather_data = await fetch_data_from_api(
-        "https://api.openweathermap.org/data/2.5/forecast", 
-        params
-    )
-    
-    forecast_tasks = []
-    for entry in weather_data["list"]:
-        forecast_tasks.append(create_forecast_entry(db, location, entry, weather_data['city']))
-    
-    await asyncio.gather(*forecast_tasks)
-    logger.info(f"Forecast processed for {location.name}")
+        entries = weather_data["list"]
+        # Epoch -> datetime for the whole batch at once
+        calculation_times = np.array([e["dt"] for e in entries], dtype="datetime64[s]").tolist()
+        # Sunrise/sunset are city-level fields shared by every entry
+        sunrise_time = utc_from_timestamp(weather_data["city"]["sunrise"])
+        sunset_time = utc_from_timestamp(weather_data["city"]["sunset"])
+
+        rows = [
+            build_forecast_row(location, entry, calculation_time, sunrise_time, sunset_time)
+            for entry, calculation_time in zip(entries, calculation_times)
+        ]
+    except Exception as e:
+        # A failed or malformed location is skipped for this run instead of
+        # cancelling the other locations in the task group
+        logger.error("Failed to fetch forecast for %s: %s", location.name, e)
+        return []
+
+    logger.info("Forecast processed for %s", location.name)
+    return rows
+
+def build_forecast_row(
+    location: Loc,
+    entry: dict,
+    calculation_time: datetime,
+    sunrise_time: datetime,
+    sunset_time: datetime
+) -> dict:
+    weather_main, description = condition_fields(entry["weather"][0])
+    main = entry["main"]
+    temperature, feels_like, min_temperature, max_temperature, pressure, humidity = main_fields(main)
+    weather_degrees, wind_speed = wind_fields(entry["wind"])
 
-async def create_forecast_entry(db: AsyncSession, location: Location, entry: dict, city:dict):
-    forecast = WeatherForecast(
-        weather_main=entry["weather"][0]["main"],
-        description=entry["weather"][0]["description"],
-        data_calculation_time=datetime.fromtimestamp(entry["dt"]),
-        temperature=round(entry["main"]["temp"] - 273.15, 2),
-        feels_like=round(entry["main"]["feels_like"] - 273.15, 2),
-        min_temperature=round(entry["main"]["temp_min"] - 273.15, 2),
-        max_temperature=round(entry["main"]["temp_max"] - 273.15, 2),
-        pressure=entry["main"]["pressure"],
-        humidity=entry["main"]["humidity"],
-        sea_level=entry["main"].get("sea_level"),
-        ground_level=entry["main"].get("grnd_level"),
-        weather_degrees=entry["wind"]["deg"],
-        wind_speed=entry["wind"]["speed"],
+    return dict(
+        weather_main=weather_main,
+        description=description,
+        data_calculation_time=calculation_time,
+        temperature=temperature,
+        feels_like=feels_like,
+        min_temperature=min_temperature,
+        max_temperature=max_temperature,
+        pressure=pressure,
+        humidity=humidity,
+        sea_level=main.get("sea_level"),
+        ground_level=main.get("grnd_level"),
+        weather_degrees=weather_degrees,
+        wind_speed=wind_speed,
         wind_gust=entry["wind"].get("gust"),
         rain=entry.get("rain", {}).get("3h"),
         snow=entry.get("snow", {}).get("3h"),
         cloudiness=entry["clouds"]["all"],
         visibility=entry.get("visibility"),
         part_of_day=entry["sys"]["pod"],
-        sunrise_time=datetime.fromtimestamp(city["sunrise"]),
-        sunset_time=datetime.fromtimestamp(city["sunset"]),
+        sunrise_time=sunrise_time,
+        sunset_time=sunset_time,
         city_id=location.id
     )
-    db.add(forecast)
\ No newline at end of file
@@ -0,0 +1,40 @@
+# app/core/cache.py
+import json
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.utils.logging_config import logger
+
+# Caching is disabled when no REDIS_URL is configured
+redis = (
+    Redis.from_url(settings.REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+    if settings.REDIS_URL else None
+)
+
+async def cache_get(key: str):
+    """
+    Return the cached JSON value for key, or None on a miss or Redis failure.
+    """
+    if redis is None:
+        return None
+    try:
+        cached = await redis.get(key)
+    except RedisError as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+    return json.loads(cached) if cached is not None else None
+
+async def cache_set(key: str, ttl: int, value):
+    """
+    Store value as JSON under key for ttl seconds; failures are logged and ignored.
+    """
+    if redis is None:
+        return
+    try:
+        await redis.setex(key, ttl, json.dumps(value))
+    except RedisError as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+async def close_cache():
+    if redis is not None:
+        await redis.aclose()
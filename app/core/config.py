@@ -1,22 +1,35 @@
 # app/core/config.py
-from pydantic_settings import BaseSettings
+from pydantic import Field, ValidationInfo, field_validator
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     # Application settings
     APP_NAME: str = "Weather Data Pipeline"
     APP_DESCRIPTION: str = "An ETL weather data pipeline"
     ENVIRONMENT: str = "development"
-    DEBUG: bool = ENVIRONMENT == "development"
+    DEBUG: bool = Field(default=None, validate_default=True)
 
     # Database URL (via .env)
     DATABASE_URL: str
 
+    # Connection pool: DB_POOL_SIZE connections stay open for request traffic,
+    # with up to DB_POOL_MAX_OVERFLOW extra during bursts (job batch writes).
+    # Keep size + overflow per worker below the server's max_connections
+    # divided by the number of workers.
+    DB_POOL_SIZE: int = 20
+    DB_POOL_MAX_OVERFLOW: int = 40
+    DB_POOL_RECYCLE_SECONDS: int = 3600
+
     # JWT and authentication settings
     JWT_SECRET_KEY: str
 
     # OpenWeather API key (via .env)
     WEATHER_API_KEY: str
 
+    # Redis for response caching (optional, via .env)
+    REDIS_URL: str | None = None
+
     # Scheduler intervals & retention
     CURRENT_WEATHER_INTERVAL_HOURS: int = 1
     FORECAST_INTERVAL_HOURS: int = 3
@@ -28,8 +41,22 @@ class Settings(BaseSettings):
         "http://localhost:5173",
     ]
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-
-settings = Settings()
+    @field_validator("DEBUG", mode="before")
+    @classmethod
+    def default_debug_from_environment(cls, value, info: ValidationInfo):
+        # Unless set explicitly, DEBUG follows the configured ENVIRONMENT
+        if value is None:
+            return info.data.get("ENVIRONMENT") == "development"
+        return value
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        frozen=True
+    )
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+settings = get_settings()
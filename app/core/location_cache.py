@@ -0,0 +1,50 @@
+# app/core/location_cache.py
+import time
+from dataclasses import dataclass
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Location
+
+@dataclass(slots=True)
+class Loc:
+    id: int
+    lat: float
+    lon: float
+    name: str
+
+# Writes in this process call invalidate_locations(), so the TTL only bounds how
+# long locations stored by other workers go unseen. It must outlive the job
+# intervals (hours) or every scheduler tick reloads the list anyway.
+LOCATIONS_TTL = 24 * 3600
+
+# (expiry, locations) for the last load, shared by the scheduled jobs
+_cache: tuple[float, list[Loc]] | None = None
+
+# Bumped by invalidate_locations(); a load that raced an invalidation is not cached
+_generation = 0
+
+async def get_locations(db: AsyncSession, ttl: int = LOCATIONS_TTL) -> list[Loc]:
+    """
+    Return all tracked locations, reloading them from the database at most once per ttl seconds.
+    """
+    global _cache
+    now = time.monotonic()
+    if _cache is not None and _cache[0] > now:
+        return _cache[1]
+
+    generation = _generation
+
+    # Plain column rows: no ORM identity map or relationship loaders needed
+    result = await db.execute(select(Location.id, Location.lat, Location.lon, Location.name))
+    locations = [Loc(id=row.id, lat=row.lat, lon=row.lon, name=row.name) for row in result.all()]
+    if generation == _generation:
+        _cache = (now + ttl, locations)
+    return locations
+
+def invalidate_locations():
+    """
+    Drop the cached location list so the next job run sees newly stored locations.
+    """
+    global _cache, _generation
+    _generation += 1
+    _cache = None
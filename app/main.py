@@ -1,21 +1,30 @@
 # app/main.py
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy import text
 from app.background_tasks.jobs.fetch_current_weather import fetch_current_weather_job
 from app.background_tasks.jobs.fetch_weather_forecast import fetch_forecast_job
 from app.core.database import Base, engine
+from app.core.cache import close_cache
 from app.core.config import settings
 from app.routers import weather_router, geocode_router, analytics_router
-from app.utils.logging_config import logger
+from app.utils.logging_config import logger, log_listener
+from app.utils.helpers.fetch_data import get_session, close_session
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Database setup
     async with engine.begin() as conn:
+        # Needed by the trigram index on location names
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
     
+    # Shared HTTP client for OpenWeather calls
+    get_session()
+
     # Scheduler setup
     scheduler = AsyncIOScheduler()
     scheduler.add_job(
@@ -35,11 +44,16 @@ async def lifespan(app: FastAPI):
     logger.info("Application startup complete")
     yield
     scheduler.shutdown()
+    await close_session()
+    await close_cache()
     logger.info("Application shutdown complete")
+    # Flush queued records and stop the logging thread
+    log_listener.stop()
 
 app = FastAPI(
     title=settings.APP_NAME,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -1,11 +1,14 @@
 # app/models/location.py
 
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index, UniqueConstraint, func
 from app.core.database import Base
 from sqlalchemy.orm import relationship
 
 class Location(Base):
     __tablename__ = "locations"
+    __table_args__ = (
+        UniqueConstraint('lat', 'lon', name='uq_locations_lat_lon'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -16,3 +19,14 @@ class Location(Base):
 
     weather_forecasts = relationship("WeatherForecast", back_populates="city")
     weather_data = relationship("WeatherData", back_populates="city")
+
+# Serves the case-insensitive city name lookups in the direct geocode endpoint
+Index('ix_locations_name_lower', func.lower(Location.name))
+
+# Trigram index for the near-miss name fallback; requires the pg_trgm extension
+Index(
+    'ix_locations_name_trgm',
+    func.lower(Location.name).label('name_lower'),
+    postgresql_using='gin',
+    postgresql_ops={'name_lower': 'gin_trgm_ops'}
+)
@@ -10,7 +10,10 @@ from app.core.database import Base
 class WeatherData(Base):
     __tablename__ = "weather_data"
     __table_args__ = (
-        Index('ix_weather_data_city_time', 'city_id', 'data_calculation_time'),
+        Index(
+            'ix_weather_data_city_time', 'city_id', 'data_calculation_time',
+            postgresql_include=['temperature', 'humidity', 'rain', 'snow', 'wind_speed', 'weather_main']
+        ),
         UniqueConstraint('city_id', 'data_calculation_time', name='uq_weather_data_city_time'),
     )
 
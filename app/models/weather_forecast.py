@@ -10,7 +10,11 @@ from app.core.database import Base
 class WeatherForecast(Base):
     __tablename__ = "weather_forecasts"
     __table_args__ = (
-        Index('ix_weather_forecasts_city_time', 'city_id', 'data_calculation_time'),
+        # Covers the analytics forecast scans so they can be served index-only
+        Index(
+            'ix_weather_forecasts_city_time', 'city_id', 'data_calculation_time',
+            postgresql_include=['temperature', 'rain', 'snow', 'wind_speed', 'weather_main']
+        ),
         UniqueConstraint('city_id', 'data_calculation_time', name='uq_weather_forecasts_city_time'),
     )
 
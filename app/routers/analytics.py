@@ -2,17 +2,23 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, between
+from sqlalchemy import select, func, between, tuple_, or_
 from datetime import datetime, timedelta, date
 from pydantic import BaseModel
 from typing import List, Optional
 
 from app.core.database import get_db
-from app.models import WeatherData, WeatherForecast, Location
+from app.models import WeatherData, WeatherForecast
 from app.utils import logger
+from app.utils.helpers.timestamps import utcnow
+from app.utils.helpers.locations import nearest_location
 
 analytics_router = APIRouter(prefix="/analytics")
 
+# Forecast alert thresholds
+WIND_ALERT_SPEED = 15
+STORM_CONDITIONS = ["Thunderstorm", "Hurricane"]
+
 # Pydantic response models
 class TemperatureTrend(BaseModel):
     date: date
@@ -83,12 +89,12 @@ async def get_weather_trends(
 ) -> WeatherTrendsResponse:
     try:
         # Resolve location
-        result = await db.execute(select(Location).where(Location.lat == lat, Location.lon == lon))
+        result = await db.execute(nearest_location(lat, lon))
         location = result.scalar_one_or_none()
         if not location:
             raise HTTPException(404, detail="Location not found")
 
-        now = datetime.now()
+        now = utcnow()
         start_date = now - timedelta(days=days)
         forecast_start = now + timedelta(hours=1)
 
@@ -107,47 +113,42 @@ async def get_weather_trends(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Analytics error: {e}")
+        logger.error("Analytics error: %s", e)
         raise HTTPException(500, detail="Error generating analytics")
 
 # Internal helpers
+# Rows come straight from our own tables, so the per-row models are built with
+# model_construct; the response is still validated once against response_model.
 async def get_historical_analysis(
     city_id: int, start: datetime, end: datetime, db: AsyncSession
 ) -> HistoricalResponse:
-    temp_q = select(
-        func.date(WeatherData.data_calculation_time).label("date"),
+    # Daily temperature trends and period totals in one scan: the () grouping
+    # set adds a single grand-total row (grouping(day) = 1) after the per-day rows.
+    day = func.date(WeatherData.data_calculation_time)
+    q = select(
+        day.label("date"),
+        func.grouping(day).label("is_total"),
         func.avg(WeatherData.temperature).label("avg_temp"),
         func.max(WeatherData.temperature).label("max_temp"),
-        func.min(WeatherData.temperature).label("min_temp")
-    ).where(
-        WeatherData.city_id == city_id,
-        between(WeatherData.data_calculation_time, start, end)
-    ).group_by("date")
-
-    rain_q = select(
+        func.min(WeatherData.temperature).label("min_temp"),
         func.coalesce(func.sum(WeatherData.rain), 0).label("total_rain"),
-        func.coalesce(func.sum(WeatherData.snow), 0).label("total_snow")
-    ).where(
-        WeatherData.city_id == city_id,
-        between(WeatherData.data_calculation_time, start, end)
-    )
-
-    wind_q = select(
+        func.coalesce(func.sum(WeatherData.snow), 0).label("total_snow"),
         func.avg(WeatherData.wind_speed).label("avg_wind"),
         func.max(WeatherData.wind_speed).label("max_wind")
     ).where(
         WeatherData.city_id == city_id,
         between(WeatherData.data_calculation_time, start, end)
-    )
+    ).group_by(func.grouping_sets(day, tuple_()))
 
-    temp_rows = (await db.execute(temp_q)).all()
-    rain_row = (await db.execute(rain_q)).first()
-    wind_row = (await db.execute(wind_q)).first()
+    rows = (await db.execute(q)).all()
 
     trends: List[TemperatureTrend] = []
-    for r in temp_rows:
-        # r.date is a string in 'YYYY-MM-DD' format
-        trends.append(TemperatureTrend(
+    totals_row = None
+    for r in rows:
+        if r.is_total:
+            totals_row = r
+            continue
+        trends.append(TemperatureTrend.model_construct(
             date=r.date,
             avg_temp=r.avg_temp,
             max_temp=r.max_temp,
@@ -155,13 +156,13 @@ async def get_historical_analysis(
         ))
 
     precipitation = Precipitation(
-        total_rain=rain_row.total_rain,
-        total_snow=rain_row.total_snow
+        total_rain=totals_row.total_rain,
+        total_snow=totals_row.total_snow
     )
 
     wind_analysis = WindAnalysis(
-        avg_wind=wind_row.avg_wind,
-        max_wind=wind_row.max_wind
+        avg_wind=totals_row.avg_wind,
+        max_wind=totals_row.max_wind
     )
 
     return HistoricalResponse(
@@ -173,28 +174,50 @@ async def get_historical_analysis(
 async def get_forecast_analysis(
     city_id: int, start: datetime, db: AsyncSession
 ) -> ForecastResponse:
-    q = select(
+    in_window = (
+        WeatherForecast.city_id == city_id,
+        WeatherForecast.data_calculation_time >= start
+    )
+    is_windy = WeatherForecast.wind_speed > WIND_ALERT_SPEED
+    is_stormy = WeatherForecast.weather_main.in_(STORM_CONDITIONS)
+
+    temps_q = select(WeatherForecast.temperature).where(
+        *in_window
+    ).order_by(WeatherForecast.data_calculation_time)
+
+    precip_q = select(
+        func.coalesce(
+            func.count().filter(
+                or_(WeatherForecast.rain > 0, WeatherForecast.snow > 0)
+            ) * 100.0 / func.nullif(func.count(), 0),
+            0.0
+        ).label("precip_pct")
+    ).where(*in_window)
+
+    # Only rows that trigger an alert cross the wire; a row can be in both lists
+    alerts_q = select(
         WeatherForecast.data_calculation_time,
         WeatherForecast.temperature,
         WeatherForecast.rain,
         WeatherForecast.snow,
         WeatherForecast.wind_speed,
-        WeatherForecast.weather_main
+        WeatherForecast.weather_main,
+        is_windy.label("is_windy"),
+        is_stormy.label("is_stormy")
     ).where(
-        WeatherForecast.city_id == city_id,
-        WeatherForecast.data_calculation_time >= start
+        *in_window,
+        or_(is_windy, is_stormy)
     ).order_by(WeatherForecast.data_calculation_time)
 
-    rows = (await db.execute(q)).all()
-    temps = [r.temperature for r in rows]
-    total = len(rows)
-    precip_count = sum(1 for r in rows if (r.rain or 0) > 0 or (r.snow or 0) > 0)
-    precip_pct = (precip_count / total * 100) if total else 0.0
+    # AsyncSession is not safe for concurrent use, so these run back to back
+    temps = list((await db.execute(temps_q)).scalars().all())
+    precip_pct = (await db.execute(precip_q)).scalar_one()
+    alert_rows = (await db.execute(alerts_q)).all()
 
     wind_alerts: List[ForecastItem] = []
     storm_warnings: List[ForecastItem] = []
-    for r in rows:
-        item = ForecastItem(
+    for r in alert_rows:
+        item = ForecastItem.model_construct(
             data_calculation_time=r.data_calculation_time,
             temperature=r.temperature,
             rain=r.rain or 0,
@@ -202,9 +225,9 @@ async def get_forecast_analysis(
             wind_speed=r.wind_speed,
             weather_main=r.weather_main
         )
-        if (r.wind_speed or 0) > 15:
+        if r.is_windy:
             wind_alerts.append(item)
-        if r.weather_main in ["Thunderstorm", "Hurricane"]:
+        if r.is_stormy:
             storm_warnings.append(item)
 
     return ForecastResponse(
@@ -240,7 +263,7 @@ async def get_statistical_aggregates(
     )
 
 async def get_weather_alerts(city_id: int, db: AsyncSession) -> List[Alert]:
-    cutoff = datetime.now() - timedelta(hours=24)
+    cutoff = utcnow() - timedelta(hours=24)
     q = select(WeatherData).where(
         WeatherData.city_id == city_id,
         WeatherData.data_calculation_time >= cutoff,
@@ -249,7 +272,7 @@ async def get_weather_alerts(city_id: int, db: AsyncSession) -> List[Alert]:
     rows = (await db.execute(q)).scalars().all()
     alerts: List[Alert] = []
     for wd in rows:
-        alerts.append(Alert(
+        alerts.append(Alert.model_construct(
             date=wd.data_calculation_time.isoformat(),
             weather_main=wd.weather_main,
             description=wd.description,
@@ -1,24 +1,108 @@
 # app/routers/geocode.py
 
+import asyncio
+import aiohttp
+from typing import Optional
 from fastapi import (
     HTTPException,
     Query,
+    Body,
     APIRouter,
     status,
-    Depends
+    Depends,
+    Request
 )
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.sql import select
+from sqlalchemy.sql import select, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models import Location
-from app.utils import logger, fetch_data_from_api
+from app.schemas import LocationOut, GeocodeQuery
+from app.utils import logger, fetch_data_from_api, single_flight
 from app.core.database import get_db
+from app.core.location_cache import invalidate_locations
+from app.core.cache import cache_get, cache_set
+from app.utils.helpers.locations import nearest_location
+from app.utils.helpers.fetch_data import GEO_DIRECT_URL, GEO_REVERSE_URL, GEOCODE_CACHE_TTL
+from app.utils.helpers.http_cache import conditional_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 geocode_router = APIRouter(prefix="/geocoding")
 
+# Geocoding results barely change, so cache hits skip both the DB and the API
+DIRECT_CACHE_TTL = 30 * 24 * 3600
+REVERSE_CACHE_TTL = 48 * 3600
+
+# Clients and CDNs may reuse a geocode response for this long
+GEOCODE_MAX_AGE = 3600
+
+# Minimum pg_trgm similarity for a stored city name to count as a near-miss match;
+# high enough that a different city sharing part of the name ("York" vs
+# "New York", ~0.56) is not returned
+NAME_SIMILARITY_THRESHOLD = 0.8
+
+# Upper bound on queries per batch request, and on their concurrent API calls
+MAX_BATCH_SIZE = 100
+BATCH_CONCURRENCY = 10
+
+# Lookups load only the columns LocationOut exposes
+LOCATION_COLUMNS = [getattr(Location, name) for name in LocationOut.model_fields]
+
+def location_payload(location) -> dict:
+    return {
+        "id": location.id,
+        "name": location.name,
+        "country": location.country,
+        "lat": location.lat,
+        "lon": location.lon,
+        "state": location.state
+    }
+
+def location_rows(entries) -> list[dict]:
+    return [
+        dict(
+            name=entry["name"],
+            lat=entry["lat"],
+            lon=entry["lon"],
+            country=entry["country"],
+            state=entry.get("state")
+        )
+        for entry in entries
+    ]
+
+def direct_query(city_name: str, state_code: str = None, country_code: str = None) -> str:
+    q = city_name
+    if state_code:
+        q += f",{state_code}"
+    if country_code:
+        q += f",{country_code}"
+    return q
+
+async def store_locations(db: AsyncSession, entries: list[dict]) -> Location:
+    """
+    Insert geocoding API entries in one statement and return the row for the last entry.
+
+    Coordinates that are already stored are skipped via ON CONFLICT (lat, lon),
+    in which case the existing row is returned instead.
+    """
+    rows = location_rows(entries)
+    stmt = pg_insert(Location).values(rows).on_conflict_do_nothing(
+        index_elements=["lat", "lon"]
+    ).returning(Location)
+    inserted = (await db.scalars(stmt)).all()
+
+    last = rows[-1]
+    for location in inserted:
+        if location.lat == last["lat"] and location.lon == last["lon"]:
+            return location
+    result = await db.scalars(
+        select(Location).where(Location.lat == last["lat"], Location.lon == last["lon"])
+    )
+    return result.one()
+
 # Direct Geocoding Endpoint
-@geocode_router.get("/direct")
+@geocode_router.get("/direct", response_model=LocationOut)
 async def get_geographical_coordinates(
+    request: Request,
     city_name: str,
     state_code: str = None,
     country_code: str = None,
@@ -28,48 +112,190 @@ async def get_geographical_coordinates(
     """
     Get geographical coordinates by city name, state code, and country code.
     """
+    cache_key = f"geocode:dir:{city_name.lower()}:{state_code}:{country_code}"
+    if cached := await cache_get(cache_key):
+        logger.info("Returned location %s from cache", city_name)
+        return conditional_response(request, LocationOut, cached, GEOCODE_MAX_AGE)
+
     try:
-        result = await db.execute(select(Location).filter(Location.name == city_name))
-        location = result.scalar_one_or_none()
-        
+        # Country codes match the stored ISO code. Stored locations carry the full
+        # state name, which can't be checked against a state code, so queries with
+        # a state code go to the API instead of returning an unverified match
+        location = None
+        near_miss = False
+        if not state_code:
+            name = city_name.lower()
+            query = select(*LOCATION_COLUMNS)
+            if country_code:
+                query = query.where(func.lower(Location.country) == country_code.lower())
+            result = await db.execute(query.where(func.lower(Location.name) == name).limit(1))
+            location = result.first()
+
+            if not location and country_code:
+                # Near misses ("new york city" vs "new york") via the trigram index,
+                # only within the requested country
+                similarity = func.similarity(func.lower(Location.name), name)
+                result = await db.execute(
+                    query.where(
+                        func.lower(Location.name).op("%")(name),
+                        similarity > NAME_SIMILARITY_THRESHOLD
+                    )
+                    .order_by(similarity.desc())
+                    .limit(1)
+                )
+                location = result.first()
+                near_miss = location is not None
+
         if location:
-            logger.info(f"Returned location {city_name} from database")
-            return location
+            logger.info("Returned location %s from database", city_name)
+            payload = location_payload(location)
+            # A near miss is not cached under the exact query's key, so a later
+            # exact match from the API is not shadowed
+            if not near_miss:
+                await cache_set(cache_key, DIRECT_CACHE_TTL, payload)
+            return conditional_response(request, LocationOut, payload, GEOCODE_MAX_AGE)
         
-        q = city_name
-        if state_code:
-            q += f",{state_code}"
-        if country_code:
-            q += f",{country_code}"
-
         params = {
-            "q": q,
+            "q": direct_query(city_name, state_code, country_code),
             "limit": limit
         }
-        # data = await fetch_data_from_api("http://api.openweathermap.org/geo/1.0/direct", params)
-        # new_location = Location(
-        #     name = data[0]["name"],
-        #     lat = data[0]["lat"],
-        #     lon = data[0]["lon"],
-        #     country = data[0]["country"],
-        #     state = data[0].get("state")
-        # )
-        # db.add(new_location)
-        # await db.commit()
-        # await db.refresh(new_location)
-        # logger.info(f"Fetched location {city_name} from external api")
-        # return new_location
+
+        async def fetch_and_store() -> dict:
+            data = await fetch_data_from_api(
+                GEO_DIRECT_URL, params, cache_ttl=GEOCODE_CACHE_TTL
+            )
+            if not data:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Location not found")
+            new_location = await store_locations(db, data[:1])
+            await db.commit()
+            invalidate_locations()
+            logger.info("Fetched location %s from external api", city_name)
+
+            payload = location_payload(new_location)
+            await cache_set(cache_key, DIRECT_CACHE_TTL, payload)
+            return payload
+
+        # Concurrent misses for the same query share one API call and insert
+        payload = await single_flight(cache_key, fetch_and_store)
+        return conditional_response(request, LocationOut, payload, GEOCODE_MAX_AGE)
     except SQLAlchemyError as e:
-        logger.error(f"Unexpected error occurred during API call: {e}")
+        logger.error("Unexpected error occurred during API call: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
             detail="An error occurred. Please try connecting to the internet"
             )
+    except asyncio.TimeoutError as e:
+        logger.error("Geocoding API timed out: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Geocoding service timed out"
+            )
+    except aiohttp.ClientError as e:
+        logger.error("Geocoding API request failed: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Geocoding service unavailable"
+            )
+
+
+async def fetch_direct_entry(semaphore: asyncio.Semaphore, q: str) -> dict | None:
+    params = {"q": q, "limit": 1}
+    try:
+        async with semaphore:
+            data = await fetch_data_from_api(GEO_DIRECT_URL, params, cache_ttl=GEOCODE_CACHE_TTL)
+    except (HTTPException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # One failed city doesn't fail the rest of the batch
+        logger.error("Batch geocoding failed for %s: %s", q, e)
+        return None
+    return data[0] if data else None
+
+# Batch Direct Geocoding Endpoint
+@geocode_router.post("/direct/batch", response_model=list[Optional[LocationOut]])
+async def get_geographical_coordinates_batch(
+    queries: list[GeocodeQuery] = Body(..., max_length=MAX_BATCH_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get geographical coordinates for many cities in one request.
+
+    Results follow the order of the queries, with null for cities that could not be found.
+    """
+    try:
+        # One SELECT for every city already stored
+        names = {query.city_name.lower() for query in queries}
+        result = await db.execute(
+            select(*LOCATION_COLUMNS).where(func.lower(Location.name).in_(names))
+        )
+        stored: dict[str, list] = {}
+        for row in result:
+            stored.setdefault(row.name.lower(), []).append(row)
+
+        query_strings = [
+            direct_query(query.city_name, query.state_code, query.country_code)
+            for query in queries
+        ]
+        locations = []
+        for query in queries:
+            if query.state_code:
+                # State codes can't be checked against stored state names
+                locations.append(None)
+                continue
+            country = query.country_code and query.country_code.lower()
+            locations.append(next(
+                (
+                    row for row in stored.get(query.city_name.lower(), [])
+                    if not country or (row.country or "").lower() == country
+                ),
+                None
+            ))
+
+        # Misses go to the API concurrently, once per distinct query string
+        misses = list(dict.fromkeys(
+            q for q, location in zip(query_strings, locations) if location is None
+        ))
+        if misses:
+            semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+            entries = await asyncio.gather(
+                *(fetch_direct_entry(semaphore, q) for q in misses)
+            )
+            found = {q: entry for q, entry in zip(misses, entries) if entry is not None}
+
+            if found:
+                rows = location_rows(found.values())
+                await db.execute(
+                    pg_insert(Location).values(rows)
+                    .on_conflict_do_nothing(index_elements=["lat", "lon"])
+                )
+                # Rows skipped by ON CONFLICT are read back alongside the new ones
+                result = await db.execute(
+                    select(*LOCATION_COLUMNS).where(
+                        tuple_(Location.lat, Location.lon).in_(
+                            [(row["lat"], row["lon"]) for row in rows]
+                        )
+                    )
+                )
+                by_coordinates = {(row.lat, row.lon): row for row in result}
+                await db.commit()
+                invalidate_locations()
+                logger.info("Fetched %d locations from external api", len(found))
+
+                for index, q in enumerate(query_strings):
+                    if locations[index] is None and q in found:
+                        locations[index] = by_coordinates.get((found[q]["lat"], found[q]["lon"]))
+
+        return [location_payload(location) if location else None for location in locations]
+    except SQLAlchemyError as e:
+        logger.error("Unexpected error occurred during batch geocoding: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred. Please try connecting to the internet"
+            )
 
 
 # Reverse Geocoding Endpoint
-@geocode_router.get("/reverse")
+@geocode_router.get("/reverse", response_model=LocationOut)
 async def get_location_by_coordinates(
+    request: Request,
     lat: float, 
     lon: float,
     db: AsyncSession = Depends(get_db)
@@ -78,35 +304,59 @@ async def get_location_by_coordinates(
     """
     Get location details by geographical coordinates.
     """
+    # ~100 m buckets so nearby coordinates share an entry
+    cache_key = f"geocode:rev:{lat:.3f}:{lon:.3f}"
+    if cached := await cache_get(cache_key):
+        logger.info("Returned location %s from cache", cached["name"])
+        return conditional_response(request, LocationOut, cached, GEOCODE_MAX_AGE)
+
     try:
-        location = (await db.execute(select(Location).where(Location.lat == lat, Location.lon == lon))).scalar_one_or_none()
+        location = (await db.execute(nearest_location(lat, lon, *LOCATION_COLUMNS))).first()
 
         if location:
-            logger.info(f"Returned location {location.name} from database")
-            return location
+            logger.info("Returned location %s from database", location.name)
+            payload = location_payload(location)
+            await cache_set(cache_key, REVERSE_CACHE_TTL, payload)
+            return conditional_response(request, LocationOut, payload, GEOCODE_MAX_AGE)
         
         params = {
             "lat": lat,
             "lon": lon
         }
-        logger.info(f"Fetched location from external api")
-        data = await fetch_data_from_api("http://api.openweathermap.org/geo/1.0/reverse", params)
-        for entry in data:
-            new_location = Location(
-                name = entry["name"],
-                lat = entry["lat"],
-                lon = entry["lon"],
-                country = entry["country"],
-                state = entry.get("state")
+
+        async def fetch_and_store() -> dict:
+            logger.info("Fetched location from external api")
+            data = await fetch_data_from_api(
+                GEO_REVERSE_URL, params, cache_ttl=GEOCODE_CACHE_TTL
             )
-            db.add(new_location)
-        await db.commit()
-        await db.refresh(new_location)
-        
-        return new_location
+            if not data:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Location not found")
+            new_location = await store_locations(db, data)
+            await db.commit()
+            invalidate_locations()
+
+            payload = location_payload(new_location)
+            await cache_set(cache_key, REVERSE_CACHE_TTL, payload)
+            return payload
+
+        # Concurrent misses for the same coordinates share one API call and insert
+        payload = await single_flight(cache_key, fetch_and_store)
+        return conditional_response(request, LocationOut, payload, GEOCODE_MAX_AGE)
     except SQLAlchemyError as e:
-        logger.error(f"Unexpected error occurred during API call: {e}")
+        logger.error("Unexpected error occurred during API call: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
             detail="An error occurred. Please try connecting to the internet"
+            )
+    except asyncio.TimeoutError as e:
+        logger.error("Geocoding API timed out: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Geocoding service timed out"
+            )
+    except aiohttp.ClientError as e:
+        logger.error("Geocoding API request failed: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Geocoding service unavailable"
             )
\ No newline at end of file
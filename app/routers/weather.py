@@ -1,70 +1,128 @@
 # app/routers/weather.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from datetime import datetime, timedelta
-from app.core.database import get_db
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import timedelta
+from app.core.database import get_db, AsyncSessionLocal
 from app.models import WeatherData, WeatherForecast, Location
+from app.schemas import WeatherOut, ForecastOut, WeatherBundleOut
 from app.utils import logger
+from app.utils.helpers.timestamps import utcnow
+from app.utils.helpers.locations import nearest_location
+from app.utils.helpers.http_cache import conditional_response
 
 weather_router = APIRouter(prefix="/weather")
 
-@weather_router.get("/current")
+# Row caps per response: latest observations first, and one 5-day forecast at
+# 3-hour steps in chronological order
+CURRENT_WEATHER_LIMIT = 24
+FORECAST_LIMIT = 40
+
+# How long clients and CDNs may reuse a response; observations are refreshed
+# more often than forecasts
+CURRENT_MAX_AGE = 5 * 60
+FORECAST_MAX_AGE = 30 * 60
+
+# Read paths load only the columns the response models expose
+WEATHER_COLUMNS = [getattr(WeatherData, name) for name in WeatherOut.model_fields]
+FORECAST_COLUMNS = [getattr(WeatherForecast, name) for name in ForecastOut.model_fields]
+
+def current_weather_query(lat: float, lon: float):
+    recent_time = utcnow() - timedelta(hours=1)
+    return (
+        select(*WEATHER_COLUMNS)
+        .where(
+            WeatherData.city_id == nearest_location(lat, lon, Location.id).scalar_subquery(),
+            WeatherData.data_calculation_time >= recent_time
+        )
+        .order_by(WeatherData.data_calculation_time.desc())
+        .limit(CURRENT_WEATHER_LIMIT)
+    )
+
+def forecast_query(lat: float, lon: float):
+    recent_time = utcnow() - timedelta(hours=6)
+    return (
+        select(*FORECAST_COLUMNS)
+        .where(
+            WeatherForecast.city_id == nearest_location(lat, lon, Location.id).scalar_subquery(),
+            WeatherForecast.data_calculation_time >= recent_time
+        )
+        .order_by(WeatherForecast.data_calculation_time)
+        .limit(FORECAST_LIMIT)
+    )
+
+@weather_router.get("/current", response_model=list[WeatherOut])
 async def get_current_weather(
+    request: Request,
     lat: float,
     lon: float,
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        recent_time = datetime.now() - timedelta(hours=1)
-        
-        result = await db.execute(
-            select(WeatherData)
-            .join(Location)
-            .where(
-                Location.lat == lat,
-                Location.lon == lon,
-                WeatherData.data_calculation_time >= recent_time
-            )
-        )
-        current_weather = result.scalars().all()
+        result = await db.execute(current_weather_query(lat, lon))
+        current_weather = result.all()
         
         if current_weather:
             logger.info("Returning cached current weather data")
-            return current_weather
+            return conditional_response(request, list[WeatherOut], current_weather, CURRENT_MAX_AGE)
             
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="No recent weather data available")
         
-    except Exception as e:
-        logger.error(f"Weather fetch error: {str(e)}")
+    except SQLAlchemyError as e:
+        logger.error("Weather fetch error: %s", e)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching weather data")
 
-@weather_router.get("/forecast")
+@weather_router.get("/forecast", response_model=list[ForecastOut])
 async def get_weather_forecast(
+    request: Request,
     lat: float,
     lon: float,
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        recent_time = datetime.now() - timedelta(hours=6)
-        
-        result = await db.execute(
-            select(WeatherForecast)
-            .join(Location)
-            .where(
-                Location.lat == lat,
-                Location.lon == lon,
-                WeatherForecast.data_calculation_time >= recent_time
-            )
-        )
-        forecasts = result.scalars().all()
+        result = await db.execute(forecast_query(lat, lon))
+        forecasts = result.all()
         
         if forecasts:
             logger.info("Returning cached forecast data")
-            return forecasts
+            return conditional_response(request, list[ForecastOut], forecasts, FORECAST_MAX_AGE)
             
-        raise HTTPException(404, detail="No recent forecast data available")
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="No recent forecast data available")
         
-    except Exception as e:
-        logger.error(f"Forecast fetch error: {str(e)}")
-        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching forecast data")
\ No newline at end of file
+    except SQLAlchemyError as e:
+        logger.error("Forecast fetch error: %s", e)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching forecast data")
+
+async def fetch_all(query) -> list:
+    # Each query gets its own session: one AsyncSession cannot run
+    # statements concurrently
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(query)).all()
+
+@weather_router.get("/bundle", response_model=WeatherBundleOut)
+async def get_weather_bundle(request: Request, lat: float, lon: float):
+    """
+    Get current weather and forecast for a location in one call.
+    """
+    try:
+        current_weather, forecasts = await asyncio.gather(
+            fetch_all(current_weather_query(lat, lon)),
+            fetch_all(forecast_query(lat, lon))
+        )
+
+        if current_weather or forecasts:
+            logger.info("Returning cached weather bundle")
+            return conditional_response(
+                request,
+                WeatherBundleOut,
+                {"current": current_weather, "forecast": forecasts},
+                CURRENT_MAX_AGE
+            )
+
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="No recent weather data available")
+
+    except SQLAlchemyError as e:
+        logger.error("Weather bundle fetch error: %s", e)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching weather data")
@@ -0,0 +1,2 @@
+from .location import LocationOut, GeocodeQuery
+from .weather import WeatherOut, ForecastOut, WeatherBundleOut
@@ -0,0 +1,19 @@
+# app/schemas/location.py
+
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+
+class LocationOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    country: Optional[str]
+    lat: float
+    lon: float
+    state: Optional[str] = None
+
+class GeocodeQuery(BaseModel):
+    city_name: str
+    state_code: Optional[str] = None
+    country_code: Optional[str] = None
@@ -0,0 +1,39 @@
+# app/schemas/weather.py
+
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import List, Optional
+
+# Every data column; internal keys (id, city_id) stay out of the public API.
+# Read paths select exactly these columns.
+class WeatherOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    data_calculation_time: datetime
+    weather_main: Optional[str]
+    description: Optional[str]
+    temperature: Optional[float]
+    feels_like: Optional[float]
+    min_temperature: Optional[float]
+    max_temperature: Optional[float]
+    pressure: Optional[float]
+    humidity: Optional[int]
+    sea_level: Optional[float]
+    ground_level: Optional[float]
+    weather_degrees: Optional[float]
+    wind_speed: Optional[float]
+    wind_gust: Optional[float]
+    rain: Optional[float]
+    snow: Optional[float]
+    cloudiness: Optional[int]
+    visibility: Optional[float]
+    part_of_day: Optional[str]
+    sunrise_time: Optional[datetime]
+    sunset_time: Optional[datetime]
+
+class ForecastOut(WeatherOut):
+    pass
+
+class WeatherBundleOut(BaseModel):
+    current: List[WeatherOut]
+    forecast: List[ForecastOut]
@@ -1,2 +1,2 @@
 from .logging_config import logger
-from .helpers import  fetch_data_from_api
\ No newline at end of file
+from .helpers import  fetch_data_from_api, get_session, close_session, single_flight
\ No newline at end of file
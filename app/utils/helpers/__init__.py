@@ -1 +1,4 @@
-from .fetch_data import fetch_data_from_api
\ No newline at end of file
+from .fetch_data import fetch_data_from_api, get_session, close_session, single_flight
+from .timestamps import utc_from_timestamp, utcnow
+from .locations import nearest_location
+from .http_cache import conditional_response
\ No newline at end of file
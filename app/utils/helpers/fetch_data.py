@@ -1,17 +1,156 @@
 # app/utils/helpers/fetch_data.py
+import asyncio
+import hashlib
+from urllib.parse import urlencode
 from fastapi import HTTPException
 from app.utils import logger
 from app.core.config import settings
+from app.core.cache import cache_get, cache_set
 import aiohttp
-from app.core.config import settings
+from yarl import URL
+from typing import Awaitable, Callable, TypeVar
+
+# OpenWeather endpoints, parsed once instead of on every request
+WEATHER_URL = URL("https://api.openweathermap.org/data/2.5/weather")
+FORECAST_URL = URL("https://api.openweathermap.org/data/2.5/forecast")
+GEO_DIRECT_URL = URL("http://api.openweathermap.org/geo/1.0/direct")
+GEO_REVERSE_URL = URL("http://api.openweathermap.org/geo/1.0/reverse")
+
+# Sent with every request; merged into a fresh dict so callers' params stay untouched
+BASE_PARAMS = {"appid": settings.WEATHER_API_KEY}
+
+# Upper bound on in-flight OpenWeather requests per job run
+MAX_CONCURRENT_REQUESTS = 16
+
+# Per-request ceiling, instead of aiohttp's 5 minute default; connects fail
+# fast so an unreachable upstream doesn't hold semaphore slots
+REQUEST_TIMEOUT_SECONDS = 8
+CONNECT_TIMEOUT_SECONDS = 2
+
+# Rate limiting and transient upstream failures are retried with backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+# Longest wait between retries; a longer Retry-After fails the call instead of
+# holding a request or a job semaphore slot that long
+MAX_RETRY_DELAY_SECONDS = 30
+
+# How long identical API requests are served from Redis
+CURRENT_WEATHER_CACHE_TTL = 5 * 60
+GEOCODE_CACHE_TTL = 30 * 60
+
+
+T = TypeVar("T")
+
+# API-backed lookups currently in flight, keyed by normalized query
+_inflight: dict[str, asyncio.Future] = {}
+
+# Process-wide client so OpenWeather calls reuse pooled keep-alive connections
+_session: aiohttp.ClientSession | None = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=MAX_CONCURRENT_REQUESTS,
+                keepalive_timeout=75,
+                use_dns_cache=True,
+                ttl_dns_cache=300
+            ),
+            timeout=aiohttp.ClientTimeout(
+                total=REQUEST_TIMEOUT_SECONDS,
+                connect=CONNECT_TIMEOUT_SECONDS
+            )
+        )
+    return _session
 
 
-async def fetch_data_from_api(endpoint: str, params: dict):
-    params["appid"] = settings.WEATHER_API_KEY
-    async with aiohttp.ClientSession() as session:
-        async with session.get(endpoint, params=params) as response:
-            if response.status != 200:
-                text = await response.text()
-                logger.error(f"API error: {text}")
+async def close_session():
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def _retry_delay(response: aiohttp.ClientResponse, attempt: int) -> float:
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return float(2 ** attempt)
+
+
+def _cache_key(endpoint: URL | str, params: dict) -> str:
+    query = urlencode(sorted(params.items()))
+    return "api:" + hashlib.sha1(f"{endpoint}?{query}".encode()).hexdigest()
+
+
+async def fetch_data_from_api(endpoint: URL | str, params: dict, cache_ttl: int | None = None):
+    """
+    GET endpoint with params, retrying transient failures.
+
+    When cache_ttl is given, successful responses are cached in Redis for that
+    many seconds and identical requests are served from the cache.
+    """
+    cache_key = None
+    if cache_ttl is not None:
+        # Keyed on the caller's params so the API key never ends up in Redis
+        cache_key = _cache_key(endpoint, params)
+        if (cached := await cache_get(cache_key)) is not None:
+            return cached
+
+    merged = {**BASE_PARAMS, **params}
+    for attempt in range(MAX_RETRIES + 1):
+        async with get_session().get(endpoint, params=merged) as response:
+            if response.status == 200:
+                data = await response.json()
+                if cache_key is not None:
+                    await cache_set(cache_key, cache_ttl, data)
+                return data
+            text = await response.text()
+            delay = _retry_delay(response, attempt)
+            if (
+                response.status not in RETRY_STATUSES
+                or attempt == MAX_RETRIES
+                or delay > MAX_RETRY_DELAY_SECONDS
+            ):
+                logger.error("API error: %s", text)
                 raise HTTPException(status_code=response.status, detail=text)
-            return await response.json()
+        logger.warning("API returned %s, retrying in %ss", response.status, delay)
+        await asyncio.sleep(delay)
+
+
+async def single_flight(key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run fetch at most once at a time per key; concurrent callers with the same
+    key wait for the first caller's result (or exception) instead of repeating it.
+
+    If the leading caller is cancelled (e.g. its client disconnected), waiters
+    are not: the next one to wake up re-runs fetch as the new leader.
+    """
+    while (future := _inflight.get(key)) is not None:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled() and not asyncio.current_task().cancelling():
+                continue
+            raise
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await fetch()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception as retrieved in case nobody else was waiting
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _inflight[key]
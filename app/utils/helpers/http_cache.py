@@ -0,0 +1,26 @@
+# app/utils/helpers/http_cache.py
+import hashlib
+from functools import lru_cache
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+
+@lru_cache
+def _adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+def conditional_response(request: Request, response_type, payload, max_age: int) -> Response:
+    """
+    Serialize payload as response_type with ETag and Cache-Control headers.
+
+    A request whose If-None-Match carries the same ETag gets an empty 304 instead,
+    so clients and CDNs can revalidate without downloading the body again.
+    """
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(payload, from_attributes=True))
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if any(tag.strip().removeprefix("W/") in (etag, "*") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
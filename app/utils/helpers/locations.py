@@ -0,0 +1,20 @@
+# app/utils/helpers/locations.py
+from sqlalchemy import Select, select
+from app.models import Location
+
+# Coordinates within 0.001 degrees (~100 m) resolve to the same stored location
+COORDINATE_TOLERANCE = 0.001
+
+def nearest_location(lat: float, lon: float, *columns) -> Select:
+    """
+    Select the stored location closest to (lat, lon) within COORDINATE_TOLERANCE.
+
+    Floating-point equality on user-supplied coordinates almost never matches, so
+    this uses a bounding-box range on lat/lon and orders candidates by distance.
+    """
+    return select(*(columns or (Location,))).where(
+        Location.lat.between(lat - COORDINATE_TOLERANCE, lat + COORDINATE_TOLERANCE),
+        Location.lon.between(lon - COORDINATE_TOLERANCE, lon + COORDINATE_TOLERANCE)
+    ).order_by(
+        (Location.lat - lat) * (Location.lat - lat) + (Location.lon - lon) * (Location.lon - lon)
+    ).limit(1)
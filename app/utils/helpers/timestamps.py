@@ -0,0 +1,16 @@
+# app/utils/helpers/timestamps.py
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1)
+
+def utc_from_timestamp(timestamp: float) -> datetime:
+    """
+    Convert a unix timestamp to a naive UTC datetime, skipping the local-time conversion of datetime.fromtimestamp.
+    """
+    return _EPOCH + timedelta(seconds=timestamp)
+
+def utcnow() -> datetime:
+    """
+    Current time as a naive UTC datetime, comparable with stored timestamps.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
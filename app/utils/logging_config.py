@@ -1,7 +1,8 @@
 # app/utils/logging_config.py
 
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # Configure logger
 log_formatter = logging.Formatter('[%(asctime)s] - %(levelname)s - %(message)s')
@@ -17,8 +18,12 @@ stream_handler = logging.StreamHandler()
 stream_handler.setFormatter(log_formatter)
 stream_handler.setLevel(logging.DEBUG)
 
+# Log calls only enqueue records; a background thread does the file/stdout I/O
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+log_listener.start()
+
 # Create and configure the logger
 logger = logging.getLogger("audit_logger")
 logger.setLevel(logging.INFO)
-logger.addHandler(file_handler)  # Write to file
-logger.addHandler(stream_handler)  # Write to stdout
+logger.addHandler(QueueHandler(log_queue))  # Write to file and stdout via the listener
@@ -0,0 +1,82 @@
+# scripts/add_locations_unique_constraint.py
+"""
+One-off migration for databases created before locations had a unique (lat, lon) constraint.
+
+create_all never alters existing tables, and the geocode endpoints' ON CONFLICT (lat, lon)
+upserts fail until the constraint exists. Older versions of /geocoding/reverse stored the
+same coordinates again on every miss, so the duplicates are merged first:
+
+1. keep the lowest id per (lat, lon),
+2. drop weather rows that would collide with the kept location's rows (for forecasts the
+   newest prediction wins),
+3. repoint weather_data / weather_forecasts to the kept location and delete the duplicates,
+4. add uq_locations_lat_lon.
+
+Everything runs in one transaction. Run once from the project root:
+
+    python -m scripts.add_locations_unique_constraint
+"""
+import asyncio
+from sqlalchemy import text
+from app.core.database import engine
+
+STATEMENTS = [
+    """
+    CREATE TEMP TABLE location_keep ON COMMIT DROP AS
+    SELECT id, min(id) OVER (PARTITION BY lat, lon) AS keep_id
+    FROM locations
+    """,
+    # Weather rows that would duplicate (city_id, data_calculation_time) after repointing
+    """
+    DELETE FROM weather_data w USING (
+        SELECT w.id, row_number() OVER (
+            PARTITION BY k.keep_id, w.data_calculation_time ORDER BY w.id
+        ) AS rn
+        FROM weather_data w JOIN location_keep k ON k.id = w.city_id
+    ) d
+    WHERE w.id = d.id AND d.rn > 1
+    """,
+    """
+    DELETE FROM weather_forecasts w USING (
+        SELECT w.id, row_number() OVER (
+            PARTITION BY k.keep_id, w.data_calculation_time ORDER BY w.id DESC
+        ) AS rn
+        FROM weather_forecasts w JOIN location_keep k ON k.id = w.city_id
+    ) d
+    WHERE w.id = d.id AND d.rn > 1
+    """,
+    """
+    UPDATE weather_data w SET city_id = k.keep_id
+    FROM location_keep k
+    WHERE w.city_id = k.id AND k.id <> k.keep_id
+    """,
+    """
+    UPDATE weather_forecasts w SET city_id = k.keep_id
+    FROM location_keep k
+    WHERE w.city_id = k.id AND k.id <> k.keep_id
+    """,
+    """
+    DELETE FROM locations l
+    USING location_keep k
+    WHERE l.id = k.id AND k.id <> k.keep_id
+    """,
+    "ALTER TABLE locations ADD CONSTRAINT uq_locations_lat_lon UNIQUE (lat, lon)",
+]
+
+async def main():
+    try:
+        async with engine.begin() as conn:
+            exists = await conn.scalar(text(
+                "SELECT 1 FROM pg_constraint WHERE conname = 'uq_locations_lat_lon'"
+            ))
+            if exists:
+                print("uq_locations_lat_lon already exists, nothing to do")
+                return
+            for statement in STATEMENTS:
+                await conn.execute(text(statement))
+            print("Merged duplicate locations and added uq_locations_lat_lon")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
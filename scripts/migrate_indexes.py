@@ -0,0 +1,63 @@
+# scripts/migrate_indexes.py
+"""
+One-off migration bringing indexes on existing databases in line with the models.
+
+create_all only builds indexes together with new tables, so on a deployed database it
+never picks up:
+
+- the INCLUDE columns on ix_weather_data_city_time / ix_weather_forecasts_city_time
+  (the old key-only indexes are dropped and rebuilt as covering indexes),
+- ix_locations_name_lower and the pg_trgm ix_locations_name_trgm on locations.
+
+The DDL is compiled from the model definitions, so it can't drift from them. Indexes
+that are already up to date are left alone; everything runs in one transaction, which
+blocks writes to the affected tables while the indexes build. Run once from the
+project root:
+
+    python -m scripts.migrate_indexes
+"""
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+from app.core.database import Base, engine
+import app.models  # noqa: F401  registers the tables on Base.metadata
+
+# Existing indexes redefined with INCLUDE columns
+COVERING_INDEXES = ["ix_weather_data_city_time", "ix_weather_forecasts_city_time"]
+# Indexes added since the tables were first created
+NEW_INDEXES = ["ix_locations_name_lower", "ix_locations_name_trgm"]
+
+async def main():
+    indexes = {
+        index.name: index
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+    }
+    try:
+        async with engine.begin() as conn:
+            # Needed by the gin_trgm_ops index
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+            for name in COVERING_INDEXES:
+                covering = await conn.scalar(
+                    text(
+                        "SELECT i.indnatts > i.indnkeyatts FROM pg_index i "
+                        "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+                    ),
+                    {"name": name}
+                )
+                if covering:
+                    print(f"{name} already covering, skipped")
+                    continue
+                await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+                await conn.execute(CreateIndex(indexes[name]))
+                print(f"Rebuilt {name}")
+
+            for name in NEW_INDEXES:
+                await conn.execute(CreateIndex(indexes[name], if_not_exists=True))
+                print(f"Ensured {name}")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())